@@ -10,6 +10,11 @@ from option_pricing import (
     Underlying,
 )
 
+try:
+    from joblib import Parallel, delayed
+except ImportError:
+    Parallel = None
+
 plt.style.use("bmh")
 
 underlying = Underlying(
@@ -21,17 +26,31 @@ option = Put(underlying, strike_price=14000.0, american=False, T=0.5)
 price, _ = BinomialModel(periods=100).calc_option_price(option)
 print(f"c) Binomial Price bei n=100: {price / 100}")
 
+
+def binomial_price(n):
+    # Double precision, the rounding error of float32 exceeds the convergence error
+    price, _ = BinomialModel(periods=n).calc_option_price(option)
+    return price / 100
+
+
 # Aufgabe c)
-prices = []
-ns = []
 # We walk through the logspace of periods to use less time.
 # This gives equidistant points for the plotting later on
-for n in tqdm(
-    np.logspace(0, 3, num=100, dtype="int"), desc="Calculate Bin Periods vs Price"
-):
-    price, _ = BinomialModel(periods=n).calc_option_price(option)
-    prices.append(price / 100)
-    ns.append(n)
+ns = np.logspace(0, 3, num=100, dtype="int")
+parallel = None
+if Parallel is not None:
+    try:
+        parallel = Parallel(n_jobs=-1, return_as="generator")
+    except TypeError:
+        # return_as needs joblib >= 1.3, older versions calculate serially
+        pass
+
+if parallel is not None:
+    # The periods are independent of each other, so calculate them in parallel
+    results = parallel(delayed(binomial_price)(n) for n in ns)
+else:
+    results = map(binomial_price, ns)
+prices = list(tqdm(results, total=len(ns), desc="Calculate Bin Periods vs Price"))
 
 fig, ax = plt.subplots()
 # Plot the binomial price curve against the periods
@@ -1,14 +1,108 @@
 from __future__ import annotations
 
+import dataclasses
+import functools
 import math
+import threading
 from abc import ABCMeta, abstractmethod
-from copy import deepcopy
 
 import numpy as np
-import scipy.stats
+from scipy.special import ndtr
 
 from option_pricing.options import Call, Option, Put
 
+try:
+    import numba
+    from numba import prange
+except ImportError:
+    numba = None
+    prange = range
+
+_INV_SQRT2 = 1.0 / math.sqrt(2.0)
+
+
+def _norm_cdf(x):
+    """Standard normal cdf of a scalar without ufunc overhead"""
+    return 0.5 * math.erfc(-x * _INV_SQRT2)
+
+
+def _recurse_european_1d(option_values, stock_prices, disc, pu, sign, strike):
+    """
+    Terminal payoff and backward induction for european calls and puts
+
+    Compiled with numba if available.
+    :param option_values: buffer for the option values, overwritten by the payoffs
+    :param sign: 1 for calls and -1 for puts
+    """
+    for i in range(option_values.shape[0]):
+        option_values[i] = max(sign * (stock_prices[i] - strike), 0.0)
+
+    for j in range(option_values.shape[0] - 2, -1, -1):
+        for i in range(j + 1):
+            down_value = option_values[i]
+            option_values[i] = disc * (
+                down_value + pu * (option_values[i + 1] - down_value)
+            )
+
+    return option_values
+
+
+def _recurse_american_1d(
+    option_values,
+    stock_prices,
+    disc,
+    pu,
+    sign,
+    strike,
+    price_beginning,
+    up_pow,
+    down_pow,
+):
+    """
+    Terminal payoff and backward induction for american calls and puts
+
+    Compiled with numba if available.
+    :param option_values: buffer for the option values, overwritten by the payoffs
+    :param sign: 1 for calls and -1 for puts
+    :param up_pow: powers of the up movement from BinomialModel.power_arrays
+    :param down_pow: powers of the down movement from BinomialModel.power_arrays
+    """
+    for i in range(option_values.shape[0]):
+        option_values[i] = max(sign * (stock_prices[i] - strike), 0.0)
+
+    for j in range(option_values.shape[0] - 2, -1, -1):
+        for i in range(j + 1):
+            down_value = option_values[i]
+            option_price = disc * (
+                down_value + pu * (option_values[i + 1] - down_value)
+            )
+            # Use Early exercise price
+            stock_price = price_beginning * up_pow[i] * down_pow[j - i]
+            option_price = max(option_price, sign * (stock_price - strike), 0.0)
+            option_values[i] = option_price
+
+    return option_values
+
+
+def _price_tree_2d(price_beginning, up_pow, down_pow, tree):
+    """
+    Fill the upper triangle of the tree with the prices at every movement
+
+    Compiled with numba if available, the periods are filled in parallel.
+    :param tree: zero initialized buffer for the tree, overwritten with the prices
+    """
+    for j in prange(tree.shape[1]):
+        for i in range(j + 1):
+            tree[i, j] = price_beginning * up_pow[i] * down_pow[j - i]
+
+    return tree
+
+
+if numba is not None:
+    _recurse_european_1d = numba.njit(cache=True, fastmath=True)(_recurse_european_1d)
+    _recurse_american_1d = numba.njit(cache=True, fastmath=True)(_recurse_american_1d)
+    _price_tree_2d = numba.njit(cache=True, parallel=True)(_price_tree_2d)
+
 
 class OptionModel(metaclass=ABCMeta):
     @abstractmethod
@@ -32,94 +126,347 @@ class BinomialModel(OptionModel):
     calculation time.
     """
 
-    def __init__(self, periods: int):
+    # Buffers reused across calculations, per thread and keyed by dtype
+    _scratch = threading.local()
+
+    def __init__(self, periods: int, full_tree: bool = False, dtype=np.float64):
         """
         Create the Binomial model with the specified number of periods.
 
         :param periods: number of periods to use in calculation
+        :param full_tree: keep the full stock, payoff and price trees and return them
+            as additional information. Requires memory quadratic in periods.
+        :param dtype: floating point type of the lattice when not using the full tree.
+            np.float32 is faster, but its rounding error grows with the periods to
+            about 4e-5 of the price at 1000 periods, which is larger than the
+            discretization error of the lattice there.
         """
         self.periods = periods
+        self.full_tree = full_tree
+        self.dtype = np.dtype(dtype)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def lattice(volatility, r, div, T, periods):
+        """
+        Derive the parameters of the lattice
+
+        Cached, as sweeps over the periods recalculate the same options.
+
+        :param volatility: volatility of the underlying
+        :param r: interest rate
+        :param div: dividend
+        :param T: time to maturity
+        :param periods: number of periods
+        :return: Tuple of up, down, pu and the discount factor per period
+        """
+        delta_t = T / periods
+        u = math.exp(volatility * math.sqrt(delta_t))
+        d = 1 / u
+        pu = (math.exp((r - div) * delta_t) - d) / (u - d)
+        disc = math.exp(-1 * (r - div) * delta_t)
+        return u, d, pu, disc
+
+    def _scratch_buffer(self, size, dtype=np.float64):
+        """
+        Get a buffer of at least the given size, reused across calculations
+
+        :param size: number of elements needed
+        :param dtype: dtype of the buffer
+        :return: uninitialized array of the given size
+        """
+        if not hasattr(self._scratch, "buffers"):
+            self._scratch.buffers = {}
+        buffers = self._scratch.buffers
+        key = np.dtype(dtype)
+        if key not in buffers or buffers[key].shape[0] < size:
+            buffers[key] = np.empty(size, dtype=key)
+        return buffers[key][:size]
 
     def price_tree(self, price_beginning, up, down):
         """
         Create the tree of price at every movement
 
+        The tree is stored in Fortran order, so the prices of a period are contiguous.
+
         :param price_beginning: beginning price
         :param up: fraction up movement
         :param down: fraction of down movement
         :return: resulting prices at all combinations
         """
         n = self.periods
-        tree = np.zeros((n + 1, n + 1))
-        for j in range(n + 1):
-            for u in range(j + 1):
-                tree[u][j] = price_beginning * (up**u) * (down ** (j - u))
+        if numba is not None:
+            exponents = np.arange(n + 1, dtype=np.float64)
+            return _price_tree_2d(
+                price_beginning,
+                np.power(up, exponents),
+                np.power(down, exponents),
+                np.zeros((n + 1, n + 1), order="F"),
+            )
+
+        # Node (i, j) has seen i up and j - i down movements.
+        # Built transposed, so the returned tree is in Fortran order.
+        exponents_up = np.arange(n + 1)[None, :]
+        exponents_down = np.arange(n + 1)[:, None] - exponents_up
+        tree_transposed = (
+            price_beginning
+            * np.power(up, exponents_up)
+            * np.power(down, exponents_down)
+        )
 
-        return tree
+        # Nodes below the diagonal are not reachable
+        return np.tril(tree_transposed).T
+
+    def power_arrays(self, up, down):
+        """
+        Create the powers of the movements for all periods
+
+        :param up: fraction up movement
+        :param down: fraction of down movement
+        :return: Tuple of up and down movement to the power of 0 to periods
+        """
+        exponents = np.arange(self.periods + 1, dtype=np.float64)
+        up_pow = np.power(up, exponents).astype(self.dtype)
+        down_pow = np.power(down, exponents).astype(self.dtype)
+        return up_pow, down_pow
+
+    def terminal_prices(self, price_beginning, up_pow, down_pow):
+        """
+        Create the prices at the last period of the tree
+
+        :param price_beginning: beginning price
+        :param up_pow: powers of the up movement from power_arrays
+        :param down_pow: powers of the down movement from power_arrays
+        :return: prices after all movements, index i has seen i up movements
+        """
+        return price_beginning * up_pow * down_pow[::-1]
 
     def option_payoff_tree(self, stock_tree, option: Option):
         """
         Create payoff of option for every node in tree
 
-        :param stock_tree: price of stock as tree. Created by price_tree
+        :param stock_tree: price of stock as tree or the terminal prices.
+            Created by price_tree or terminal_prices
         :param option: the option to calculate the payoff
         :return: tree of option payoffs
         """
         return option.option_payoff(stock_tree)
 
-    def recurse_option_tree(self, option_tree, option, pu, pd, r, div, delta_t):
+    def _recurse_european(self, option_values, disc, pu):
+        """
+        Walk backwards from the terminal payoffs and calculate the pricing of the option
+
+        Only the values of a single period are kept and updated in place.
+
+        :param option_values: payoffs of option at the terminal prices
+        :param disc: discount factor of a single period
+        :param pu: probability of up movement
+        :return: option values, the price of the option is at index 0
+        """
+        for j in range(self.periods - 1, -1, -1):
+            # pu * up + pd * down with pd = 1 - pu, but one multiplication less
+            down_values = option_values[: j + 1]
+            down_values += pu * (option_values[1 : j + 2] - down_values)
+            down_values *= disc
+
+        return option_values
+
+    def _recurse_american(
+        self, option_values, disc, pu, payoff, price_beginning, up_pow, down_pow
+    ):
+        """
+        Walk backwards like _recurse_european, exercising early where favourable
+
+        :param option_values: payoffs of option at the terminal prices
+        :param disc: discount factor of a single period
+        :param pu: probability of up movement
+        :param payoff: payoff function of the option, e.g. option.option_payoff
+        :param price_beginning: beginning price
+        :param up_pow: powers of the up movement from power_arrays
+        :param down_pow: powers of the down movement from power_arrays
+        :return: option values, the price of the option is at index 0
+        """
+        for j in range(self.periods - 1, -1, -1):
+            values = option_values[: j + 1]
+            values += pu * (option_values[1 : j + 2] - values)
+            values *= disc
+            # Use early exercise price at the prices of this period
+            stock_prices = price_beginning * up_pow[: j + 1] * down_pow[j::-1]
+            np.maximum(values, payoff(stock_prices), out=values)
+
+        return option_values
+
+    def recurse_full_tree(self, option_tree, option, pu, disc):
         """
         Walk through the payoff tree and calculate the pricing of the option
 
-        :param option_tree: payoffs of option from option_payoff_tree
+        :param option_tree: payoffs of option from option_payoff_tree, is overwritten
+            with the prices
         :param option: the option to calculate
-        :param pu:
-        :param pd:
-        :param r:
-        :param div:
-        :param delta_t:
+        :param pu: probability of up movement
+        :param disc: discount factor of a single period
         :return:
         """
-        price_tree = deepcopy(option_tree)
+        price_tree = option_tree
         for j in range(self.periods - 1, -1, -1):
-            for i in range(j + 1):
-                option_price = (
-                    pu * price_tree[i + 1][j + 1] + pd * price_tree[i][j + 1]
-                ) * np.exp(-1 * (r - div) * delta_t)
-                # Use Early exercise price
-                if option.american:
-                    option_price = np.maximum(option_price, price_tree[i][j])
+            down_prices = price_tree[: j + 1, j + 1]
+            option_prices = disc * (
+                down_prices + pu * (price_tree[1 : j + 2, j + 1] - down_prices)
+            )
+            # Use Early exercise price
+            if option.american:
+                option_prices = np.maximum(option_prices, price_tree[: j + 1, j])
 
-                price_tree[i][j] = option_price
+            price_tree[: j + 1, j] = option_prices
 
         return price_tree
 
     def calc_option_price(self, option: Option):
         """
-        Calculates the option pricing including the tree of prices at every movement
+        Calculates the option pricing
+
+        The trees of prices at every movement are only included if the model
+        was created with full_tree. Otherwise, the prices of hashable options
+        are memoized per option and model parameters.
 
         :param option: the option to calculate
         :return:
         """
-        T = option.T
+        if self.full_tree:
+            return self._calc_option_price(option)
+
+        try:
+            hash(option)
+        except TypeError:
+            # e.g. options with list fields, calculate without the cache
+            return self._calc_option_price(option)
+
+        price = self._calc_cached(type(self), self.periods, self.dtype, option)
+        return price, {}
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def _calc_cached(cls, periods, dtype, option):
+        """Memoized price of the option in a model of the given class and parameters"""
+        price, _ = cls(periods, dtype=dtype)._calc_option_price(option)
+        return price
+
+    def price_grid(self, option: Option, strikes) -> np.ndarray:
+        """
+        Calculate the prices of the option for many strike prices at once
+
+        All strikes share the lattice, so a single backward induction over
+        the option values of all strikes is needed.
+
+        :param option: the option to calculate, its strike price is replaced by strikes
+        :param strikes: array of strike prices
+        :return: array with the price of the option for every strike
+        """
+        strikes = np.asarray(strikes, dtype=self.dtype)
+        grid_option = dataclasses.replace(option, strike_price=strikes)
+
+        def payoff(stock_prices):
+            # One row per stock price, one column per strike
+            return grid_option.option_payoff(stock_prices[:, None])
+
+        price_beginning, disc, pu, up_pow, down_pow = self._lattice_1d(option)
+        stock_prices = self.terminal_prices(price_beginning, up_pow, down_pow)
+        if option.american:
+            option_values = self._recurse_american(
+                payoff(stock_prices),
+                disc,
+                pu,
+                payoff,
+                price_beginning,
+                up_pow,
+                down_pow,
+            )
+        else:
+            option_values = self._recurse_european(payoff(stock_prices), disc, pu)
+        return option_values[0]
+
+    def _option_lattice(self, option: Option):
+        """
+        Parameters of the lattice for the option
+
+        :param option: the option to calculate
+        :return: Tuple of up, down, pu and the discount factor per period
+        """
         underlying = option.underlying
-        div = underlying.dividend
-        r = underlying.interest_rate
-        delta_t = T / self.periods
+        return self.lattice(
+            underlying.volatility,
+            underlying.interest_rate,
+            underlying.dividend,
+            option.T,
+            self.periods,
+        )
 
-        u = math.exp(underlying.volatility * math.sqrt(delta_t))
-        d = 1 / u
-        pu = (np.exp((r - div) * delta_t) - d) / (u - d)
-        pd = 1 - pu
+    def _lattice_1d(self, option: Option):
+        """
+        Parameters of the 1-D lattice in the precision of the model
+
+        :param option: the option to calculate
+        :return: Tuple of beginning price, discount factor, pu and the power arrays
+        """
+        underlying = option.underlying
+        u, d, pu, disc = self._option_lattice(option)
+        up_pow, down_pow = self.power_arrays(u, d)
+        price_beginning, disc, pu = (
+            self.dtype.type(x) for x in (underlying.base_beginning, disc, pu)
+        )
+        return price_beginning, disc, pu, up_pow, down_pow
+
+    def _calc_option_price(self, option: Option):
+        if not self.full_tree:
+            price_beginning, disc, pu, up_pow, down_pow = self._lattice_1d(option)
+            stock_prices = self.terminal_prices(price_beginning, up_pow, down_pow)
+            if numba is not None and isinstance(option, (Call, Put)):
+                sign = 1 if isinstance(option, Call) else -1
+                buffer = self._scratch_buffer(self.periods + 1, self.dtype)
+                strike = self.dtype.type(option.strike_price)
+                if option.american:
+                    option_values = _recurse_american_1d(
+                        buffer,
+                        stock_prices,
+                        disc,
+                        pu,
+                        sign,
+                        strike,
+                        price_beginning,
+                        up_pow,
+                        down_pow,
+                    )
+                else:
+                    option_values = _recurse_european_1d(
+                        buffer, stock_prices, disc, pu, sign, strike
+                    )
+            elif option.american:
+                option_values = self._recurse_american(
+                    self.option_payoff_tree(stock_prices, option),
+                    disc,
+                    pu,
+                    option.option_payoff,
+                    price_beginning,
+                    up_pow,
+                    down_pow,
+                )
+            else:
+                option_values = self._recurse_european(
+                    self.option_payoff_tree(stock_prices, option), disc, pu
+                )
+            return option_values[0], {}
+
+        underlying = option.underlying
+        u, d, pu, disc = self._option_lattice(option)
         stock_tree = self.price_tree(
             price_beginning=underlying.base_beginning, up=u, down=d
         )
         payoff_tree = self.option_payoff_tree(stock_tree, option)
-        price_tree = self.recurse_option_tree(
-            payoff_tree, option, pu, pd, r, div, delta_t
+        price_tree = self.recurse_full_tree(
+            payoff_tree.copy(order="K"), option, pu, disc
         )
 
-        return price_tree[0][0], {
+        return price_tree[0, 0], {
             "payoff_tree": payoff_tree,
             "stock_tree": stock_tree,
             "price_tree": price_tree,
@@ -136,49 +483,58 @@ class BlackScholesModel(OptionModel):
     Developed in 1973, it is still regarded as one of the best ways for pricing an options contract.
     """
 
+    @classmethod
+    def batch(cls, S0, K, T, r, q, sigma, flags):
+        """
+        Calculate the prices of many calls and puts at once
+
+        All parameters can be scalars or NumPy arrays broadcastable to each other.
+
+        :param S0: beginning price of the underlying
+        :param K: strike price
+        :param T: time to maturity
+        :param r: interest rate
+        :param q: dividend
+        :param sigma: volatility of the underlying
+        :param flags: 1 for calls and -1 for puts
+        :return: array of option prices
+        """
+        vsqrtT = sigma * np.sqrt(T)
+        d1 = (np.log(S0 / K) + ((r - q) + 0.5 * sigma**2) * T) / vsqrtT
+        d2 = d1 - vsqrtT
+        Nd1 = ndtr(d1)  # N(d1)
+        Nd2 = ndtr(d2)  # N(d2)
+        disc_q = np.exp(-q * T)
+        disc_r = np.exp(-r * T)
+
+        call = S0 * disc_q * Nd1 - K * disc_r * Nd2
+        put = K * disc_r * ndtr(-d2) - S0 * disc_q * ndtr(-d1)
+        return np.where(np.asarray(flags) > 0, call, put)
+
     def calc_option_price(self, option: Option):
         T = option.T
         underlying = option.underlying
-        d1 = (
-            np.log(underlying.base_beginning / option.strike_price)
-            + (
-                (
-                    (underlying.interest_rate - underlying.dividend)
-                    + 0.5 * underlying.volatility**2
-                )
-                * T
-            )
-        ) / (
-            underlying.volatility * np.sqrt(T)
-        )  # d1
-        d2 = (
-            np.log(underlying.base_beginning / option.strike_price)
-            + (
-                (
-                    (underlying.interest_rate - underlying.dividend)
-                    - 0.5 * underlying.volatility**2
-                )
-                * T
-            )
-        ) / (
-            underlying.volatility * np.sqrt(T)
-        )  # d2
-        Nd1 = scipy.stats.norm.cdf(d1, 0.0, 1.0)  # N(d1)
-        Nd2 = scipy.stats.norm.cdf(d2, 0.0, 1.0)  # N(d1)
-        Nminusd1 = scipy.stats.norm.cdf(-d1, 0.0, 1.0)  # N(-d1)
-        Nminusd2 = scipy.stats.norm.cdf(-d2, 0.0, 1.0)  # N(-d2)
+        vsqrtT = underlying.volatility * math.sqrt(T)
+        logSK = math.log(underlying.base_beginning / option.strike_price)
+        drift = (underlying.interest_rate - underlying.dividend) * T
+        d1 = (logSK + drift + 0.5 * vsqrtT * vsqrtT) / vsqrtT
+        d2 = d1 - vsqrtT
+        disc_q = math.exp(-underlying.dividend * T)
+        disc_r = math.exp(-underlying.interest_rate * T)
 
         if isinstance(option, Call):
+            Nd1 = _norm_cdf(d1)  # N(d1)
+            Nd2 = _norm_cdf(d2)  # N(d2)
             option_price = (
-                underlying.base_beginning * np.exp(-underlying.dividend * T) * Nd1
-                - option.strike_price * np.exp(-underlying.interest_rate * T) * Nd2
+                underlying.base_beginning * disc_q * Nd1
+                - option.strike_price * disc_r * Nd2
             )
         elif isinstance(option, Put):
+            Nminusd1 = _norm_cdf(-d1)  # N(-d1)
+            Nminusd2 = _norm_cdf(-d2)  # N(-d2)
             option_price = (
-                option.strike_price * np.exp(-underlying.interest_rate * T) * Nminusd2
-                - underlying.base_beginning
-                * np.exp(-underlying.dividend * T)
-                * Nminusd1
+                option.strike_price * disc_r * Nminusd2
+                - underlying.base_beginning * disc_q * Nminusd1
             )
         else:
             raise RuntimeError(f"Black Scholes not implemented for {type(option)}.")
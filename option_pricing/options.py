@@ -5,7 +5,7 @@ import matplotlib.pyplot as plt
 import numpy as np
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(frozen=True)
 class Underlying:
     """
     Underlying allows to add different underlyings in an abstract way.
@@ -20,7 +20,7 @@ class Underlying:
     interest_rate: float
 
 
-@dataclasses.dataclass()
+@dataclasses.dataclass(frozen=True)
 class Option(metaclass=ABCMeta):
     """
     An option created for an underlying.
@@ -63,19 +63,15 @@ class Put(Option):
         return np.maximum(0, self.strike_price - price)
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(frozen=True)
 class SprintCertificate(Option):
     cap: float
     factor: float
 
     def option_payoff(self, price):
         cap_payout = (self.cap - self.strike_price) * self.factor
-        return (
-            np.minimum(
-                cap_payout,
-                np.maximum(
-                    price - self.strike_price, (price - self.strike_price) * self.factor
-                ),
-            )
-            + price
-        )
+        excess = price - self.strike_price
+        # Same as min(cap_payout, max(excess, excess * factor)) in a single pass
+        payoff = np.clip(excess * self.factor, excess, cap_payout)
+        payoff += price
+        return payoff
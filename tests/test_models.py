@@ -0,0 +1,136 @@
+import dataclasses
+
+import numpy as np
+import pytest
+
+from option_pricing import (
+    BinomialModel,
+    BlackScholesModel,
+    Call,
+    Put,
+    SprintCertificate,
+    Underlying,
+    models,
+)
+
+
+@pytest.fixture
+def underlying():
+    return Underlying(
+        base_beginning=100.0, volatility=0.2, dividend=0.0, interest_rate=0.02
+    )
+
+
+def test_black_scholes_batch_matches_single_options(underlying):
+    # Includes deep out of the money strikes
+    strikes = np.array([20.0, 30.0, 90.0, 100.0, 110.0, 400.0])
+    for option_type, flag in ((Call, 1), (Put, -1)):
+        expected = [
+            BlackScholesModel().calc_option_price(
+                option_type(underlying, T=1.0, strike_price=strike, american=False)
+            )[0]
+            for strike in strikes
+        ]
+        prices = BlackScholesModel.batch(
+            underlying.base_beginning,
+            strikes,
+            1.0,
+            underlying.interest_rate,
+            underlying.dividend,
+            underlying.volatility,
+            np.full(strikes.shape, flag),
+        )
+
+        assert np.all(prices >= 0)
+        np.testing.assert_allclose(prices, expected, rtol=1e-10, atol=1e-300)
+
+
+@pytest.mark.parametrize("american", [False, True])
+def test_binomial_price_grid_matches_single_options(underlying, american):
+    strikes = np.linspace(80.0, 120.0, 9)
+    model = BinomialModel(periods=50)
+    options = [
+        Call(underlying, T=1.0, strike_price=0.0, american=american),
+        Put(underlying, T=1.0, strike_price=0.0, american=american),
+        SprintCertificate(
+            underlying, T=1.0, strike_price=0.0, american=american, cap=110.0, factor=2
+        ),
+    ]
+    for option in options:
+        expected = [
+            model.calc_option_price(dataclasses.replace(option, strike_price=strike))[0]
+            for strike in strikes
+        ]
+
+        np.testing.assert_allclose(
+            model.price_grid(option, strikes), expected, rtol=1e-12
+        )
+
+
+@pytest.mark.parametrize("use_numba", [True, False])
+@pytest.mark.parametrize("american", [False, True])
+def test_binomial_float32_close_to_float64(
+    underlying, monkeypatch, american, use_numba
+):
+    if not use_numba:
+        # Calls and puts take the NumPy path as well
+        monkeypatch.setattr(models, "numba", None)
+    # Prices are memoized independent of the path
+    BinomialModel._calc_cached.cache_clear()
+
+    options = [
+        Call(underlying, T=1.0, strike_price=100.0, american=american),
+        Put(underlying, T=1.0, strike_price=100.0, american=american),
+        SprintCertificate(
+            underlying,
+            T=1.0,
+            strike_price=100.0,
+            american=american,
+            cap=110.0,
+            factor=2,
+        ),
+    ]
+    for option in options:
+        expected, _ = BinomialModel(periods=200).calc_option_price(option)
+        price, _ = BinomialModel(periods=200, dtype=np.float32).calc_option_price(
+            option
+        )
+
+        assert price.dtype == np.float32
+        np.testing.assert_allclose(price, expected, rtol=5e-5)
+    BinomialModel._calc_cached.cache_clear()
+
+
+@pytest.mark.parametrize("american", [False, True])
+@pytest.mark.parametrize("option_type", [Call, Put, SprintCertificate])
+def test_binomial_full_tree_matches_1d(underlying, option_type, american):
+    kwargs = {"cap": 110.0, "factor": 2} if option_type is SprintCertificate else {}
+    option = option_type(
+        underlying, T=1.0, strike_price=100.0, american=american, **kwargs
+    )
+
+    expected, _ = BinomialModel(periods=50).calc_option_price(option)
+    price, trees = BinomialModel(periods=50, full_tree=True).calc_option_price(option)
+
+    assert price == pytest.approx(expected, rel=1e-12)
+    assert trees["price_tree"][0, 0] == price
+    assert trees["stock_tree"][0, 0] == underlying.base_beginning
+
+
+@dataclasses.dataclass(frozen=True)
+class BasketCall(Call):
+    # Unhashable field, prices of these options can not be cached
+    weights: list
+
+
+def test_binomial_unhashable_option(underlying):
+    option = BasketCall(
+        underlying, T=1.0, strike_price=100.0, american=False, weights=[1.0]
+    )
+    expected, _ = BinomialModel(periods=50).calc_option_price(
+        Call(underlying, T=1.0, strike_price=100.0, american=False)
+    )
+
+    price, _ = BinomialModel(periods=50).calc_option_price(option)
+
+    assert price == pytest.approx(expected)